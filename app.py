@@ -4,15 +4,26 @@ import streamlit.components.v1 as components
 import os
 import time
 import base64
-import tempfile
-from src.pdf_utils import extract_text
-from src.text_filter import clean_text, split_sentences, analyze_text_quality
-from src.tts_utils import generate_audio, estimate_duration, cleanup_audio_files, get_audio_duration
+from src.tts_utils import (
+    AUDIO_FORMATS, audio_cache_path, generate_audio, generate_audio_batch, estimate_duration,
+    get_audio_duration, get_audio_format, touch_audio,
+)
 from src.state_utils import init_session_state
+from src.doc_store import document_key, get_document, get_or_build_document, pdf_digest
+from src.pdf_utils import ZOOM_LEVELS, find_sentence_page, page_count, render_page
+from src.jobs import process_pdf, save_upload, shared_queue
 
 # Initialize session state (must be before any Streamlit UI code)
 init_session_state(st)
 
+# Background workers (worker.py) take over extraction and synthesis when running
+job_queue = shared_queue()
+use_workers = job_queue.active_workers() > 0
+
+# PDF viewer: pages shown at once (current + look-ahead) and scroll box height
+VIEWER_LOOKAHEAD = 1
+VIEWER_HEIGHT_PX = 800
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Listen2Research",
@@ -23,15 +34,6 @@ st.set_page_config(
 # Custom CSS for NaturalReader-like interface
 st.markdown("""
 <style>
-.pdf-viewer {
-    border: 2px solid #e0e0e0;
-    border-radius: 10px;
-    height: 80vh;
-    width: 100%;
-    overflow: hidden;
-    background: #f9f9f9;
-    aspect-ratio: 8.5 / 11;
-}
 .control-bar {
     color: white;
     padding: 20px;
@@ -72,7 +74,7 @@ with st.sidebar:
         ["Full document audio", "Step-by-step reading"],
         index=0,
         key="reading_mode",
-        help="Full audio: generates one MP3 for the whole document. Step-by-step: reads and plays sentence by sentence."
+        help="Full audio: generates one audio file for the whole document. Step-by-step: reads and plays sentence by sentence."
     )
 
     # Playback speed for full audio mode
@@ -87,41 +89,108 @@ with st.sidebar:
         "Pre-buffer sentences", min_value=1, max_value=20, value=st.session_state.buffer_size, step=1,
         help="How many sentences to generate before starting playback.")
 
-    if st.session_state.sentences:
+    st.selectbox(
+        "Audio encoding", options=list(AUDIO_FORMATS), key="audio_format",
+        help="Speech-optimized encodings (mono low-bitrate MP3, Opus) make audio much smaller to store and stream.")
+
+    # Document stats are precomputed once per shared document. This block runs
+    # before the reading loop, so it is rendered on every rerun while reading.
+    doc = st.session_state.document
+    if doc:
         st.markdown("### 📊 Document Stats")
-        st.write(f"**Sentences:** {len(st.session_state.sentences)}")
-        total_words = sum(len(s.split()) for s in st.session_state.sentences)
-        st.write(f"**Words:** {total_words}")
-        est_time = total_words / 150  # 150 WPM
-        st.write(f"**Est. Time:** {est_time:.1f} min")
-        
+        st.write(f"**Sentences:** {len(doc)}")
+        st.write(f"**Words:** {doc.total_words}")
+        st.write(f"**Est. Time:** {doc.est_minutes:.1f} min")
 
+        if st.button("🗑️ Clear"):
+            for key in ['document', 'is_reading', 'current_sentence', 'pdf_file', 'pdf_upload_id', 'pdf_hash', 'viewer_page']:
+                if key in st.session_state:
+                    del st.session_state[key]
+            st.rerun()
+
+
+def _turn_page(delta, n_pages):
+    """Manual paging stops the viewer from following the reading position."""
+    st.session_state.viewer_page = min(max(st.session_state.viewer_page + delta, 0), n_pages - 1)
+    st.session_state.viewer_follow = False
+
+
+def _go_to_page():
+    st.session_state.viewer_page = st.session_state.viewer_page_input - 1
+    st.session_state.viewer_follow = False
+
+
+@st.fragment
+def render_pdf_viewer(pdf_bytes, doc):
+    """Show the current page plus a short look-ahead, rendered on demand from the shared page cache.
+
+    Runs as a fragment, so paging and zooming rerun only the viewer, not the reading loop.
+    pdf_bytes may be a zero-copy view of the upload; it is only parsed on a cache miss.
+    """
+    n_pages = page_count(doc.pdf_hash, pdf_bytes)
+    if n_pages == 0:
+        st.warning("This PDF has no pages to display.")
+        return
+    if st.session_state.viewer_follow and st.session_state.current_sentence < len(doc):
+        st.session_state.viewer_page = find_sentence_page(
+            doc.pdf_hash, pdf_bytes, doc[st.session_state.current_sentence], near=st.session_state.viewer_page)
+    page = st.session_state.viewer_page = min(st.session_state.viewer_page, n_pages - 1)
+    st.session_state.viewer_page_input = page + 1
+
+    col1, col2, col3, col4, col5 = st.columns([1, 1.5, 1, 1.5, 2])
+    with col1:
+        st.button("◀", key="viewer_prev", on_click=_turn_page, args=(-1, n_pages), disabled=page == 0)
+    with col2:
+        st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="viewer_page_input",
+                        on_change=_go_to_page, label_visibility="collapsed")
+    with col3:
+        st.button("▶", key="viewer_next", on_click=_turn_page, args=(1, n_pages), disabled=page >= n_pages - 1)
+    with col4:
+        st.selectbox("Zoom", ZOOM_LEVELS, key="viewer_zoom", format_func=lambda z: f"{z:.0%}",
+                     label_visibility="collapsed")
+    with col5:
+        st.toggle("Follow reading", key="viewer_follow")
+
+    # Only these pages are rendered and sent; the browser never receives the whole PDF
+    with st.container(height=VIEWER_HEIGHT_PX):
+        for p in range(page, min(page + 1 + VIEWER_LOOKAHEAD, n_pages)):
+            st.image(render_page(doc.pdf_hash, pdf_bytes, p, st.session_state.viewer_zoom),
+                     caption=f"Page {p + 1} of {n_pages}", output_format="PNG")
+
+def retry_job(kind, payload):
+    """Re-enqueue a failed job at the user's request (enqueue otherwise returns the failed one)."""
+    job_id = job_queue.enqueue(kind, payload, reuse_done=kind != 'synthesize', retry_failed=True)
+    if kind == 'synthesize':
+        st.session_state.synth_jobs[payload['filename']] = job_id
+        st.session_state.is_reading = True
 
-def render_pdf_viewer(pdf_file):
-    """Render PDF in iframe like NaturalReader."""
-    # Save uploaded file to temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(pdf_file.getvalue())
-        tmp_path = tmp_file.name
-    
-    # Convert to base64 for embedding
-    with open(tmp_path, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode('utf-8')
-    
-    # Clean up temp file
-    os.unlink(tmp_path)
-    
-    pdf_display = f'''
-    <div class="pdf-viewer">
-        <iframe src="data:application/pdf;base64,{base64_pdf}" 
-                width="100%" height="100%" 
-                style="border: none;">
-            <p>Your browser does not support PDFs. 
-               <a href="data:application/pdf;base64,{base64_pdf}">Download the PDF</a>.</p>
-        </iframe>
-    </div>
-    '''
-    return pdf_display
+
+def synthesize_in_background(items, audio_fmt):
+    """Enqueue synthesis jobs for (text, path) pairs that are not on disk yet.
+
+    A job that already failed is tracked as is, not retried; wait_for_audio reports it.
+    """
+    for text, path in items:
+        if not os.path.exists(path):
+            st.session_state.synth_jobs[path] = job_queue.enqueue(
+                'synthesize', {'text': text, 'filename': path, 'lang': 'en', 'format': audio_fmt.name},
+                reuse_done=False)
+
+
+def wait_for_audio(path, status_placeholder):
+    """Return once path exists; until then show job status and poll via rerun."""
+    if os.path.exists(path):
+        return
+    job_id = st.session_state.synth_jobs.get(path)
+    job = job_queue.get(job_id) if job_id is not None else None
+    if job is not None and job['status'] == 'failed':
+        st.error(f"❌ Failed to generate audio: {job['error'].splitlines()[0]}")
+        st.button("🔁 Retry audio", on_click=retry_job, args=(job['kind'], job['payload']))
+        st.session_state.is_reading = False
+        st.stop()
+    status_placeholder.info(f"⏳ Audio {job['status'] if job else 'queued'} in background worker...")
+    time.sleep(0.5)
+    st.rerun()
 
 # App header
 st.markdown("""
@@ -138,12 +207,14 @@ uploaded_file = st.file_uploader("📄 Upload a PDF Document", type=["pdf"],
 
 if uploaded_file is not None:
     st.session_state.pdf_file = uploaded_file
+    # Hash each upload once; reruns reuse the digest instead of copying and rehashing the file
+    if st.session_state.pdf_upload_id != uploaded_file.file_id:
+        st.session_state.pdf_hash = pdf_digest(uploaded_file.getbuffer())
+        st.session_state.pdf_upload_id = uploaded_file.file_id
     
     # Process PDF with advanced filtering
     with st.spinner("🔍 Processing PDF with advanced text filtering..."):
         try:
-            raw_text = extract_text(uploaded_file)
-            
             # Choose filter mode
             mode = st.sidebar.radio(
                 "Filter Mode",
@@ -151,14 +222,35 @@ if uploaded_file is not None:
                 index=0,
                 help="Balanced keeps more sentences; Strict removes brackets, formulas, numeric tables, etc."
             )
+            splitter = st.sidebar.radio(
+                "Sentence Splitter",
+                options=["punkt", "fast"],
+                index=0,
+                help="Punkt uses NLTK; Fast is a regex splitter tuned for scientific abbreviations (et al., Fig., e.g.)."
+            )
 
-            # Analyze text before filtering
-            text_stats = analyze_text_quality(raw_text, mode=mode)
-            
-            # Apply aggressive filtering
-            filtered_text = clean_text(raw_text, mode=mode)
-            sentences = split_sentences(filtered_text, mode=mode)
-            st.session_state.sentences = sentences
+            # Sessions opening the same PDF share one immutable document
+            doc_key = document_key(st.session_state.pdf_hash, mode=mode, splitter=splitter)
+            if get_document(doc_key) is None and use_workers:
+                pdf_path = save_upload(uploaded_file.getbuffer(), pdf_hash=st.session_state.pdf_hash)
+                job_id = job_queue.enqueue('process_document', {'pdf_path': pdf_path, 'mode': mode, 'splitter': splitter})
+                job = job_queue.get(job_id)
+                if job['status'] == 'failed':
+                    st.error(f"❌ Error processing PDF: {job['error'].splitlines()[0]}")
+                    st.button("🔁 Retry processing", on_click=retry_job, args=(job['kind'], job['payload']))
+                    st.stop()
+                if job['status'] != 'done':
+                    st.info(f"⏳ Document {job['status']} for background processing...")
+                    time.sleep(0.5)
+                    st.rerun()
+                result = job['result']
+                st.session_state.document = get_or_build_document(
+                    doc_key, lambda: (result['sentences'], result['stats']))
+            else:
+                st.session_state.document = get_or_build_document(
+                    doc_key, lambda: process_pdf(uploaded_file, mode=mode, splitter=splitter))
+            sentences = st.session_state.document
+            text_stats = sentences.stats
             
             # Show filtering results
             st.markdown('<div class="filter-stats">', unsafe_allow_html=True)
@@ -189,7 +281,7 @@ if uploaded_file is not None:
             st.error(f"❌ Error processing PDF: {e}")
 
 # Main interface - PDF viewer and reading panel
-if st.session_state.sentences:
+if st.session_state.document:
     
     # Control panel
     st.markdown('<div class="control-bar">', unsafe_allow_html=True)
@@ -202,7 +294,8 @@ if st.session_state.sentences:
         # Start from beginning (resets index)
         if st.button("🔊 Start", disabled=st.session_state.is_reading):
             st.session_state.current_sentence = 0
-            cleanup_audio_files("audio")
+            st.session_state.viewer_page = 0
+            # Audio files are content-keyed and shared across sessions, so keep them
             st.session_state.prepared_until = -1
             st.session_state.is_reading = True
     
@@ -212,12 +305,12 @@ if st.session_state.sentences:
             if st.button("⏸️ Pause"):
                 st.session_state.is_reading = False
         else:
-            if st.button("▶️ Continue", disabled=not st.session_state.sentences):
+            if st.button("▶️ Continue", disabled=not st.session_state.document):
                 st.session_state.is_reading = True
     
     with col4:
-        if st.button("⏭️ Next", disabled=st.session_state.current_sentence >= len(st.session_state.sentences) - 1):
-            if st.session_state.current_sentence < len(st.session_state.sentences) - 1:
+        if st.button("⏭️ Next", disabled=st.session_state.current_sentence >= len(st.session_state.document) - 1):
+            if st.session_state.current_sentence < len(st.session_state.document) - 1:
                 st.session_state.current_sentence += 1
                 st.session_state.is_reading = False  # stop any ongoing playback before manual skip
     
@@ -225,29 +318,28 @@ if st.session_state.sentences:
         if st.button("🔄 Reset"):
             st.session_state.is_reading = False
             st.session_state.current_sentence = 0
-            cleanup_audio_files("audio")
+            st.session_state.viewer_page = 0
             st.session_state.prepared_until = -1
 
     # Progress bar
-    if st.session_state.sentences:
-        progress = st.session_state.current_sentence / len(st.session_state.sentences)
+    if st.session_state.document:
+        progress = st.session_state.current_sentence / len(st.session_state.document)
         st.progress(progress)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("📍 Position", f"{st.session_state.current_sentence + 1}/{len(st.session_state.sentences)}")
+            st.metric("📍 Position", f"{st.session_state.current_sentence + 1}/{len(st.session_state.document)}")
         with col2:
             st.metric("📊 Progress", f"{progress*100:.1f}%")
         with col3:
-            st.metric("⏳ Remaining", len(st.session_state.sentences) - st.session_state.current_sentence - 1)
+            st.metric("⏳ Remaining", len(st.session_state.document) - st.session_state.current_sentence - 1)
 
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Main content layout
     # Single column: PDF only
     st.markdown("### 📖 PDF Document")
-    pdf_html = render_pdf_viewer(st.session_state.pdf_file)
-    st.markdown(pdf_html, unsafe_allow_html=True)
+    render_pdf_viewer(st.session_state.pdf_file.getbuffer(), st.session_state.document)
     
 
     # Audio playback area
@@ -256,16 +348,20 @@ if st.session_state.sentences:
 
 
     # Reading logic
-    if st.session_state.is_reading and st.session_state.sentences:
+    if st.session_state.is_reading and st.session_state.current_sentence < len(st.session_state.document):
         reading_mode = st.session_state.reading_mode if 'reading_mode' in st.session_state else "Full document audio"
         playback_speed = st.session_state.playback_speed if 'playback_speed' in st.session_state else 1.0
+        audio_fmt = get_audio_format(st.session_state.audio_format)
         if reading_mode == "Full document audio":
             # Generate big audio file for the whole document at the start
             os.makedirs("audio", exist_ok=True)
-            full_text = " ".join(st.session_state.sentences)
-            big_audio_path = "audio/full_document.mp3"
-            if not os.path.exists(big_audio_path):
-                ok = generate_audio(full_text, big_audio_path)
+            full_text = st.session_state.document.full_text
+            big_audio_path = audio_cache_path(full_text, fmt=audio_fmt, prefix="full_document_")
+            if use_workers:
+                synthesize_in_background([(full_text, big_audio_path)], audio_fmt)
+                wait_for_audio(big_audio_path, status_placeholder)
+            elif not os.path.exists(big_audio_path):
+                ok = generate_audio(full_text, big_audio_path, fmt=audio_fmt)
                 if not ok:
                     st.error("❌ Failed to generate full document audio.")
                     st.session_state.is_reading = False
@@ -280,7 +376,7 @@ if st.session_state.sentences:
                         components.html(
                             f"""
                             <audio id='mainAudio' controls autoplay onloadeddata='this.currentTime=0; this.play();' preload='auto'>
-                                <source src='data:audio/mp3;base64,{b64}' type='audio/mpeg'>
+                                <source src='data:{audio_fmt.mime};base64,{b64}' type='{audio_fmt.mime}'>
                             </audio>
                             <script>
                             var audio = document.getElementById('mainAudio');
@@ -291,22 +387,43 @@ if st.session_state.sentences:
                         )
                         st.caption("If you don’t hear anything, click Play once to allow audio in your browser.")
                     else:
-                        st.audio(big_audio_path, format='audio/mp3')
+                        st.audio(big_audio_path, format=audio_fmt.mime)
                 except Exception:
-                    st.audio(big_audio_path, format='audio/mp3')
+                    st.audio(big_audio_path, format=audio_fmt.mime)
+
+            touch_audio(big_audio_path)
 
             # Show download button for the big audio file
             if os.path.exists(big_audio_path):
-                st.download_button("Download Full Audio (MP3)", open(big_audio_path, "rb"), file_name="full_document.mp3", mime="audio/mp3")
+                st.download_button(f"Download Full Audio ({audio_fmt.name})", open(big_audio_path, "rb"),
+                                   file_name=f"full_document{audio_fmt.ext}", mime=audio_fmt.mime)
 
         elif reading_mode == "Step-by-step reading":
             # Sentence-by-sentence reading logic (previous version)
             start_idx = st.session_state.current_sentence
-            end_idx = min(len(st.session_state.sentences), start_idx + st.session_state.buffer_size)
-            for i in range(start_idx, end_idx):
-                audio_path_i = f"audio/sentence_{i:03}.mp3"
-                if i > st.session_state.prepared_until or not os.path.exists(audio_path_i):
-                    ok = generate_audio(st.session_state.sentences[i], audio_path_i)
+            end_idx = min(len(st.session_state.document), start_idx + st.session_state.buffer_size)
+            os.makedirs("audio", exist_ok=True)
+            doc = st.session_state.document
+
+            def sentence_audio_path(i):
+                return audio_cache_path(doc[i], fmt=audio_fmt, prefix=f"sentence_{i:03}_")
+
+            pending = [
+                i for i in range(start_idx, end_idx)
+                if i > st.session_state.prepared_until or not os.path.exists(sentence_audio_path(i))
+            ]
+            if use_workers:
+                # Workers fill the pre-buffer; only the current sentence is waited for
+                synthesize_in_background(((doc[i], sentence_audio_path(i)) for i in pending), audio_fmt)
+                if pending:
+                    st.session_state.prepared_until = max(st.session_state.prepared_until, pending[-1])
+                wait_for_audio(sentence_audio_path(start_idx), status_placeholder)
+            else:
+                # Synthesize (and transcode) the whole pre-buffer concurrently over the pooled client
+                results = generate_audio_batch(
+                    ((doc[i], sentence_audio_path(i)) for i in pending), fmt=audio_fmt
+                )
+                for i, ok in zip(pending, results):
                     if not ok:
                         st.error(f"❌ Failed to generate audio for sentence {i+1}")
                         st.session_state.is_reading = False
@@ -314,8 +431,7 @@ if st.session_state.sentences:
                     st.session_state.prepared_until = max(st.session_state.prepared_until, i)
 
             # Play current sentence (from beginning)
-            current_sentence = st.session_state.sentences[start_idx]
-            audio_path = f"audio/sentence_{start_idx:03}.mp3"
+            audio_path = sentence_audio_path(start_idx)
 
             with audio_placeholder.container():
                 try:
@@ -325,53 +441,34 @@ if st.session_state.sentences:
                         components.html(
                             f"""
                             <audio controls autoplay onloadeddata='this.currentTime=0; this.play();' preload='auto'>
-                                <source src='data:audio/mp3;base64,{b64}' type='audio/mpeg'>
+                                <source src='data:{audio_fmt.mime};base64,{b64}' type='{audio_fmt.mime}'>
                             </audio>
                             """,
                             height=80,
                         )
                         st.caption("If you don’t hear anything, click Play once to allow audio in your browser.")
                     else:
-                        st.audio(audio_path, format='audio/mp3')
+                        st.audio(audio_path, format=audio_fmt.mime)
                 except Exception:
-                    st.audio(audio_path, format='audio/mp3')
+                    st.audio(audio_path, format=audio_fmt.mime)
+
+            touch_audio(audio_path)
 
-            # Use real duration if available to avoid skips
-            duration = get_audio_duration(audio_path, fallback_text=current_sentence)
+            # Use real duration if available to avoid skips, else the document's precomputed estimate
+            duration = get_audio_duration(audio_path, fallback=doc.durations[start_idx])
             time.sleep(duration + 0.25)
 
             # Move to next sentence and continue
             st.session_state.current_sentence += 1
             st.rerun()
     
-    elif st.session_state.is_reading and st.session_state.current_sentence >= len(st.session_state.sentences):
+    elif st.session_state.is_reading and st.session_state.current_sentence >= len(st.session_state.document):
         # Reading completed
         st.session_state.is_reading = False
         st.success("🎉 Reading completed!")
         st.balloons()
 
 
-# Sidebar
-with st.sidebar:
-    st.markdown("### ⚙️ Settings")
-    st.info("**Voice:** Google TTS")
-    st.info("**Language:** English") 
-    st.info("**Quality:** High")
-    
-    if st.session_state.sentences:
-        st.markdown("### 📊 Document Stats")
-        st.write(f"**Sentences:** {len(st.session_state.sentences)}")
-        total_words = sum(len(s.split()) for s in st.session_state.sentences)
-        st.write(f"**Words:** {total_words}")
-        est_time = total_words / 150  # 150 WPM
-        st.write(f"**Est. Time:** {est_time:.1f} min")
-        
-        if st.button("🗑️ Clear"):
-            for key in ['sentences', 'is_reading', 'current_sentence', 'pdf_file']:
-                if key in st.session_state:
-                    del st.session_state[key]
-            st.rerun()
-
 # Footer
 st.markdown("---")
 st.markdown("**🚀 Listen2Research** - Intelligent PDF Reading with Aggressive Text Filtering")
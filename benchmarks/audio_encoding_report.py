@@ -0,0 +1,83 @@
+"""
+Compare the speech encodings in tts_utils.AUDIO_FORMATS on a sample corpus.
+
+Reports bytes on disk, bytes per page load (the base64 data URI app.py inlines
+for one sentence) and ffmpeg CPU time per format. Point --corpus at a directory
+of gTTS MP3s (e.g. a filled audio/ cache). Without one, a synthetic speech-like
+corpus is generated in gTTS's output format (24 kHz mono, 32 kbps), which is
+fine for sizes but only indicative for CPU cost.
+Run from the repo root: python -m benchmarks.audio_encoding_report [--corpus DIR]
+"""
+
+import argparse
+import math
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from src.tts_utils import AUDIO_FORMATS, transcode_audio, transcode_pool
+
+
+def make_synthetic_corpus(out_dir, n=40):
+    ffmpeg = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    paths = []
+    for i in range(n):
+        seconds = 3 + (i % 7)  # typical sentence lengths
+        # Voiced tone with syllable-rate amplitude modulation over a little noise
+        src = (f"sine=f={110 + 7 * i}:r=24000:d={seconds},tremolo=f=4:d=0.9[a];"
+               f"anoisesrc=r=24000:d={seconds}:a=0.02:c=pink[b];[a][b]amix=inputs=2")
+        path = os.path.join(out_dir, f"sample_{i:03}.mp3")
+        subprocess.run([ffmpeg, '-nostdin', '-loglevel', 'error', '-y', '-filter_complex', src,
+                        '-ac', '1', '-c:a', 'libmp3lame', '-b:a', '32k', path], check=True)
+        paths.append(path)
+    return paths
+
+
+def child_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of source MP3s")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            sources = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus) if f.endswith('.mp3'))
+        else:
+            os.makedirs(os.path.join(tmp, 'corpus'))
+            sources = make_synthetic_corpus(os.path.join(tmp, 'corpus'))
+            print("(synthetic corpus; pass --corpus with real gTTS output for representative numbers)")
+        base_bytes = sum(os.path.getsize(p) for p in sources)
+        print(f"{len(sources)} files, {base_bytes / 1024:.1f} KiB source MP3\n")
+        print(f"{'format':15s} {'disk KiB':>9s} {'vs mp3':>7s} {'page load B':>12s} "
+              f"{'cpu ms/file':>12s} {'wall s':>7s}")
+
+        for fmt in AUDIO_FORMATS.values():
+            out_dir = os.path.join(tmp, fmt.name)
+            os.makedirs(out_dir)
+            jobs = []
+            for src in sources:
+                # transcode_audio consumes its input when passing through, so work on copies
+                copy = os.path.join(out_dir, os.path.basename(src) + '.src')
+                with open(src, 'rb') as fi, open(copy, 'wb') as fo:
+                    fo.write(fi.read())
+                jobs.append((copy, os.path.join(out_dir, os.path.basename(src)[:-4] + fmt.ext)))
+
+            cpu0, t0 = child_cpu(), time.perf_counter()
+            ok = list(transcode_pool().map(lambda j: transcode_audio(j[0], j[1], fmt), jobs))
+            wall, cpu = time.perf_counter() - t0, child_cpu() - cpu0
+            assert all(ok), f"transcoding to {fmt.name} failed"
+
+            sizes = [os.path.getsize(dst) for _, dst in jobs]
+            page = sum(len(f"data:{fmt.mime};base64,") + 4 * math.ceil(n / 3) for n in sizes)
+            print(f"{fmt.name:15s} {sum(sizes) / 1024:9.1f} {sum(sizes) / base_bytes:7.0%} "
+                  f"{page / len(sizes):12.0f} {cpu * 1000 / len(sizes):12.1f} {wall:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare per-session sentence lists with the shared document store.
+
+Simulates N sessions opening the same paper and measures the memory each
+approach holds plus the cost of recomputing the sidebar stats on a rerun.
+Run from the repo root: python -m benchmarks.doc_store_sessions [sessions]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from src.doc_store import build_document, document_key, get_or_build_document, pdf_digest
+
+WORDS = ("model data results method analysis network learning signal "
+         "performance training sample error baseline layer measured").split()
+
+
+def make_sentences(n=3000, seed=0):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))).capitalize() + "."
+        for _ in range(n)
+    ]
+
+
+def sidebar_stats_list(sentences):
+    # What app.py did on every rerun (twice)
+    total_words = sum(len(s.split()) for s in sentences)
+    return len(sentences), total_words, total_words / 150
+
+
+def sidebar_stats_doc(doc):
+    return len(doc), doc.total_words, doc.est_minutes
+
+
+def measure(fn):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, size
+
+
+def time_per_call(fn, arg, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(n_sessions=100):
+    source = make_sentences()
+    key = document_key(pdf_digest(" ".join(source).encode()))
+
+    # Each session gets its own list, as split_sentences returns a fresh one per run
+    sessions, list_bytes = measure(
+        lambda: [{"sentences": [s.encode().decode() for s in source]} for _ in range(n_sessions)]
+    )
+    list_rerun = time_per_call(sidebar_stats_list, sessions[0]["sentences"]) * 2
+    del sessions
+
+    shared, doc_bytes = measure(
+        lambda: [{"document": get_or_build_document(key, lambda: (source, {})), "current_sentence": 0}
+                 for _ in range(n_sessions)]
+    )
+    doc_rerun = time_per_call(sidebar_stats_doc, shared[0]["document"])
+    single = build_document("probe", source)
+    assert list(single) == source
+
+    print(f"sessions: {n_sessions}, sentences: {len(source)}")
+    print(f"per-session lists : {list_bytes / 1e6:8.2f} MB total, "
+          f"{list_bytes / n_sessions / 1e3:8.1f} KB/session, stats {list_rerun * 1e3:.3f} ms/rerun")
+    print(f"shared document   : {doc_bytes / 1e6:8.2f} MB total, "
+          f"{doc_bytes / n_sessions / 1e3:8.1f} KB/session, stats {doc_rerun * 1e6:.3f} us/rerun")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,65 @@
+"""
+Queue latency and worker throughput of the SQLite job queue as workers are added.
+
+Enqueues N jobs that each hold a worker for a fixed time (standing in for one
+sentence of synthesis), drains them with 1..K worker processes and reports
+jobs/s plus enqueue-to-start latency percentiles.
+Run from the repo root: python -m benchmarks.job_queue_throughput [jobs] [job_ms]
+"""
+
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from src.job_queue import JobQueue, run_worker
+
+
+def sleep_job(payload):
+    time.sleep(payload["seconds"])
+    return {"i": payload["i"]}
+
+
+def _worker(db_path, stop):
+    run_worker(JobQueue(db_path), {"sleep": sleep_job}, poll_interval=0.01, stop=stop)
+
+
+def drain(db_path, n_workers, n_jobs, seconds):
+    queue = JobQueue(db_path)
+    stop = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=_worker, args=(db_path, stop)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    while queue.active_workers() < n_workers:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    ids = [queue.enqueue("sleep", {"i": i, "seconds": seconds}) for i in range(n_jobs)]
+    # Duplicates must collapse onto the jobs above
+    assert [queue.enqueue("sleep", {"i": i, "seconds": seconds}) for i in range(n_jobs)] == ids
+    while queue.counts().get("done", 0) < n_jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for p in procs:
+        p.join()
+
+    latencies = sorted(queue.get(i)["started_at"] - queue.get(i)["enqueued_at"] for i in ids)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    return n_jobs / elapsed, statistics.median(latencies), p95
+
+
+def main(n_jobs=200, job_ms=20):
+    print(f"{n_jobs} jobs of {job_ms} ms each")
+    print(f"{'workers':>7s} {'jobs/s':>8s} {'p50 wait ms':>12s} {'p95 wait ms':>12s}")
+    for n_workers in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate, p50, p95 = drain(os.path.join(tmp, "jobs.sqlite3"), n_workers, n_jobs, job_ms / 1000)
+        print(f"{n_workers:7d} {rate:8.1f} {p50 * 1000:12.0f} {p95 * 1000:12.0f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,309 @@
+"""
+Concurrent-session load test for app.py with a local stub TTS backend.
+
+Drives N simulated sessions through the real script with Streamlit's AppTest,
+one thread per session as the Streamlit server does. Each session uploads a
+generated PDF, switches to step-by-step reading and reads it to the end
+(including the app's time.sleep playback), while gTTS traffic goes to
+benchmarks.tts_stub_server. Every N runs in a fresh process and reports rerun
+latency percentiles, CPU, RSS and payload bytes per session. Runs offline.
+
+Rerun latency is the time from script start to its last UI delta, i.e. until
+the audio element is on the page, excluding the playback sleep after it.
+
+Concurrent AppTest runs need patches to private Streamlit internals, so the
+harness checks for them first and names the tested Streamlit version if any
+are missing.
+
+Run from the repo root: python -m benchmarks.load_test --sessions 1 5 10 25
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import statistics
+import tempfile
+import threading
+import time
+
+_process_patches = contextlib.ExitStack()
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def make_pdf(n_sentences, seed, pages=1):
+    import fitz  # PyMuPDF
+
+    from benchmarks.doc_store_sessions import make_sentences
+
+    sentences = make_sentences(n_sentences, seed=seed)
+    doc = fitz.open()
+    per_page = -(-len(sentences) // pages)
+    for i in range(0, len(sentences), per_page):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 100, 550, 700), " ".join(sentences[i:i + per_page]), fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _install_recorder():
+    """Hook AppTest's script runner so each run's timing and payload are recorded per session."""
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+    from streamlit.testing.v1 import local_script_runner
+
+    current = threading.local()
+    original_init = local_script_runner.LocalScriptRunner.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        session = getattr(current, "session", None)
+        if session is None:
+            return
+        state = {}
+
+        def on_event(sender, event, **kw):
+            now = time.perf_counter()
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                state["start"] = state["last"] = now
+            elif event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG:
+                msg = kw["forward_msg"]
+                session["payload_bytes"] += msg.ByteSize()
+                if msg.WhichOneof("type") == "delta":
+                    state["last"] = now
+            elif "start" in state and event in (
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN,
+            ):
+                session["reruns"].append(state.pop("last") - state.pop("start"))
+
+        self.on_event.connect(on_event, weak=False)
+
+    local_script_runner.LocalScriptRunner.__init__ = init
+    return current
+
+
+# Streamlit internals patched below, as (module, attribute path); tested with 1.66.0
+TESTED_STREAMLIT = "1.66.0"
+_INTERNALS = [
+    ("streamlit.runtime", "Runtime._instance"),
+    ("streamlit.components.v2.component_manager", "BidiComponentManager"),
+    ("streamlit.runtime.caching.storage.dummy_cache_storage", "MemoryCacheStorageManager"),
+    ("streamlit.runtime.dataframe_source_manager", "DataframeSourceManager"),
+    ("streamlit.runtime.media_file_manager", "MediaFileManager"),
+    ("streamlit.runtime.memory_media_file_storage", "MemoryMediaFileStorage"),
+    ("streamlit.runtime.scriptrunner", "ScriptRunnerEvent"),
+    ("streamlit.runtime.scriptrunner.script_cache", "ScriptCache"),
+    ("streamlit.testing.v1.app_test", "Runtime"),
+    ("streamlit.testing.v1.app_test", "ScriptCache"),
+    ("streamlit.testing.v1.app_test", "patch_config_options"),
+    ("streamlit.testing.v1.local_script_runner", "ScriptCache"),
+    ("streamlit.testing.v1.local_script_runner", "LocalScriptRunner.__init__"),
+]
+
+
+def check_streamlit_internals():
+    """Exit with a clear message if this Streamlit lacks the internals the harness patches."""
+    import importlib
+
+    import streamlit
+
+    missing = []
+    for module, path in _INTERNALS:
+        try:
+            obj = importlib.import_module(module)
+            for attr in path.split("."):
+                obj = getattr(obj, attr)
+        except (ImportError, AttributeError):
+            missing.append(f"{module}.{path}")
+    if missing:
+        raise SystemExit(
+            f"benchmarks.load_test patches Streamlit internals missing from streamlit "
+            f"{streamlit.__version__}: {', '.join(missing)}. It was tested with streamlit "
+            f"{TESTED_STREAMLIT} (pip install streamlit=={TESTED_STREAMLIT})."
+        )
+
+
+def _allow_concurrent_apptests():
+    """Let several AppTest sessions run at once in one process, like a real server.
+
+    AppTest installs a fresh mock Runtime, config patch and script cache per run
+    and clears them afterwards, which breaks runs still in progress on other
+    threads (and re-parses app.py concurrently, which CPython 3.11's parser does
+    not tolerate). Install one long-lived runtime, config and script cache instead,
+    as the Streamlit server has, and make AppTest's per-run swaps no-ops.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    shared_runtime = MagicMock(spec=Runtime)
+    shared_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    shared_runtime.dataframe_source_mgr = DataframeSourceManager()
+    shared_runtime.bidi_component_registry = BidiComponentManager()
+    shared_runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    Runtime._instance = shared_runtime
+    # Enter the config patch once and keep it referenced for the life of the process
+    _process_patches.enter_context(app_test.patch_config_options({"global.appTest": True}))
+
+    class _RuntimeSink:
+        _instance = None
+
+    app_test.Runtime = _RuntimeSink
+    script_cache = ScriptCache()
+    script_cache.get_bytecode(APP)  # parse once, before any session thread starts
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+
+
+def _session(recorder, pdf, result, timeout):
+    result["errors"] = []
+    try:
+        _read_document(recorder, pdf, result, timeout)
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def _read_document(recorder, pdf, result, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    recorder.session = result
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    _run(at)
+    at.file_uploader[0].upload("paper.pdf", pdf, "application/pdf")
+    _run(at)
+    at.sidebar.radio(key="reading_mode").set_value("Step-by-step reading")
+    next(r for r in at.sidebar.radio if r.label == "Sentence Splitter").set_value("fast")
+    _run(at)
+    result["sentences"] = len(at.session_state.document)
+    start = next(b for b in at.button if "Start" in b.label)
+    start.click()
+    _run(at)  # follows the app's st.rerun() chain until reading completes
+    result["read"] = at.session_state.current_sentence
+
+
+def run_level(n_sessions, args, out):
+    """Run n_sessions concurrently in this (fresh) process and put a summary on out."""
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+    if not args.verbose:
+        # Keep the app's own prints out of the report
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+    recorder = _install_recorder()
+    _allow_concurrent_apptests()
+    from benchmarks.tts_stub_server import StubTTSServer
+    from src.tts_client import shared_client
+
+    stub = StubTTSServer(latency=args.tts_latency, jitter=args.tts_latency / 4,
+                         bytes_per_char=args.bytes_per_char).start()
+    client, _ = shared_client()
+    client.url = stub.url
+    client.rate, client.burst, client.max_concurrency = 1000, 100, 32
+
+    pdfs = [make_pdf(args.sentences, seed=0 if args.shared_doc else i) for i in range(n_sessions)]
+    workdir = tempfile.mkdtemp(prefix="l2r-load-")
+    os.chdir(workdir)  # app.py writes audio/ and data/ relative to the cwd
+
+    rss_peak = [0]
+    done = threading.Event()
+
+    def sample_rss():
+        while not done.wait(0.1):
+            with open("/proc/self/status") as f:
+                rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+            rss_peak[0] = max(rss_peak[0], rss)
+
+    threading.Thread(target=sample_rss, daemon=True).start()
+    results = [{"reruns": [], "payload_bytes": 0} for _ in range(n_sessions)]
+    threads = [threading.Thread(target=_session, args=(recorder, pdfs[i], results[i], args.timeout))
+               for i in range(n_sessions)]
+    usage0, wall0 = resource.getrusage(resource.RUSAGE_SELF), time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall0
+    usage1 = resource.getrusage(resource.RUSAGE_SELF)
+    done.set()
+    stub.shutdown()
+
+    reruns = sorted(r for s in results for r in s["reruns"])
+    cpu = (usage1.ru_utime - usage0.ru_utime) + (usage1.ru_stime - usage0.ru_stime)
+    out.put({
+        "sessions": n_sessions,
+        "wall_s": wall,
+        "reruns": len(reruns),
+        "p50_ms": statistics.median(reruns) * 1000 if reruns else 0,
+        "p95_ms": reruns[int(0.95 * (len(reruns) - 1))] * 1000 if reruns else 0,
+        "p99_ms": reruns[int(0.99 * (len(reruns) - 1))] * 1000 if reruns else 0,
+        "cpu_pct": 100 * cpu / wall,
+        "rss_peak_mb": rss_peak[0] / 1024,
+        "payload_kb_per_session": statistics.mean(s["payload_bytes"] for s in results) / 1024,
+        "completed": sum(1 for s in results if s.get("read") == s.get("sentences", -1) and not s.get("errors")),
+        "errors": sorted({e.splitlines()[0] for s in results for e in s.get("errors", [])}),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--sentences", type=int, default=10, help="sentences per generated PDF")
+    parser.add_argument("--shared-doc", action="store_true", help="all sessions open the same PDF")
+    parser.add_argument("--tts-latency", type=float, default=0.1, help="stub TTS latency in seconds")
+    parser.add_argument("--bytes-per-char", type=int, default=30,
+                        help="stub MP3 size; 270 matches gTTS, lower shortens playback sleeps")
+    parser.add_argument("--timeout", type=float, default=600, help="per-run AppTest timeout")
+    parser.add_argument("--verbose", action="store_true", help="show the app's output")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON lines")
+    args = parser.parse_args()
+    check_streamlit_internals()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'sessions':>8s} {'reruns':>6s} {'p50 ms':>7s} {'p95 ms':>7s} {'p99 ms':>7s} "
+          f"{'CPU %':>6s} {'RSS MB':>7s} {'KB/sess':>8s} {'done':>5s}")
+    for n in args.sessions:
+        out = ctx.Queue()
+        proc = ctx.Process(target=run_level, args=(n, args, out))
+        proc.start()
+        while True:
+            try:
+                res = out.get(timeout=1)
+                break
+            except queue.Empty:
+                if not proc.is_alive():
+                    raise SystemExit(f"load test process for {n} sessions exited with code {proc.exitcode}")
+        proc.join()
+        if args.json:
+            print(json.dumps(res))
+            continue
+        print(f"{n:8d} {res['reruns']:6d} {res['p50_ms']:7.0f} {res['p95_ms']:7.0f} {res['p99_ms']:7.0f} "
+              f"{res['cpu_pct']:6.0f} {res['rss_peak_mb']:7.0f} {res['payload_kb_per_session']:8.0f} "
+              f"{res['completed']:>2d}/{n:<2d}")
+        for err in res["errors"]:
+            print(f"         error: {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the old base64 iframe viewer with on-demand page rendering.
+
+For generated PDFs of increasing length (text plus a small incompressible
+figure per page), measures what one rerun costs: the payload sent to the
+browser (the whole PDF as a data URI vs. the visible page plus look-ahead as
+PNGs), time to first page with a cold cache, a warm rerun from the page cache,
+and the process RSS growth of each approach, which includes MuPDF's parsed
+document and pixmaps. Each size runs in a fresh process so RSS is comparable.
+Run from the repo root: python -m benchmarks.pdf_viewer [pages ...]
+"""
+
+import base64
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+
+LOOKAHEAD = 1
+
+
+def make_pdf(pages, sentences_per_page=25, figure_px=100):
+    import fitz  # PyMuPDF
+
+    from benchmarks.doc_store_sessions import make_sentences
+
+    doc = fitz.open()
+    sentences = make_sentences(pages * sentences_per_page)
+    for i in range(pages):
+        page = doc.new_page()
+        chunk = sentences[i * sentences_per_page:(i + 1) * sentences_per_page]
+        page.insert_textbox(fitz.Rect(50, 60, 550, 500), " ".join(chunk), fontsize=10)
+        figure = fitz.Pixmap(fitz.csRGB, figure_px, figure_px, os.urandom(figure_px * figure_px * 3), False)
+        page.insert_image(fitz.Rect(150, 520, 450, 780), pixmap=figure)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _rss_kb(field="VmRSS"):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field + ":"))
+
+
+def _reset_peak_rss():
+    # Linux: writing 5 resets VmHWM to the current RSS
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _measure(pages, out):
+    from src.pdf_utils import PageImageCache, page_count, render_page
+
+    pdf_bytes = make_pdf(pages)
+    pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+    # Old viewer: the whole file as a data URI in the page
+    _reset_peak_rss()
+    base = _rss_kb()
+    b64 = base64.b64encode(pdf_bytes).decode("utf-8")
+    html = f'<iframe src="data:application/pdf;base64,{b64}"></iframe>'
+    iframe_kb, iframe_rss = len(html) / 1024, _rss_kb("VmHWM") - base
+    del b64, html
+
+    # New viewer: visible page plus look-ahead from a cold cache, then warm
+    cache = PageImageCache()
+    _reset_peak_rss()
+    base = _rss_kb()
+    t0 = time.perf_counter()
+    n = page_count(pdf_hash, pdf_bytes)
+    images = [render_page(pdf_hash, pdf_bytes, p, 1.0, cache=cache) for p in range(min(1 + LOOKAHEAD, n))]
+    first = time.perf_counter() - t0
+    pages_rss = _rss_kb("VmHWM") - base
+    t0 = time.perf_counter()
+    for p in range(min(1 + LOOKAHEAD, n)):
+        render_page(pdf_hash, pdf_bytes, p, 1.0, cache=cache)
+    warm = time.perf_counter() - t0
+
+    out.put((pages, len(pdf_bytes) / 1024, iframe_kb, iframe_rss / 1024, sum(len(i) for i in images) / 1024,
+             first, warm, pages_rss / 1024))
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 1000]
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'pages':>6s} {'PDF KB':>8s} {'iframe KB':>10s} {'iframe RSS MB':>14s} "
+          f"{'pages KB':>9s} {'first ms':>9s} {'warm ms':>8s} {'pages RSS MB':>13s}")
+    for pages in sizes:
+        out = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(pages, out))
+        proc.start()
+        pages, pdf_kb, iframe_kb, iframe_rss, sent_kb, first, warm, pages_rss = out.get()
+        proc.join()
+        print(f"{pages:6d} {pdf_kb:8.0f} {iframe_kb:10.0f} {iframe_rss:14.1f} "
+              f"{sent_kb:9.0f} {first * 1000:9.1f} {warm * 1000:8.2f} {pages_rss:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
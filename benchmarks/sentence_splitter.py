@@ -0,0 +1,117 @@
+"""
+Accuracy and throughput of the fast scientific sentence splitter vs NLTK punkt.
+
+Accuracy is reported separately for the development sample
+(benchmarks/data/annotated_sentences.txt, which includes the cases the fast
+splitter's rules were written for) and a held-out sample that is never tuned
+against (annotated_sentences_heldout.txt), both one gold sentence per line:
+boundary precision/recall/F1 and the share of gold sentences recovered exactly.
+Throughput repeats the development sample up to the requested size and reports
+MB/s for each splitter, including the parallel chunked mode of the fast one.
+The pretrained punkt model (punkt_tab, as installed by the Dockerfile) is the
+baseline; an untrained Punkt tokenizer and the app's regex fallback are shown
+too, since they are what the app uses when punkt_tab is missing.
+Run from the repo root: python -m benchmarks.sentence_splitter [megabytes]
+"""
+
+import os
+import re
+import sys
+import time
+
+import nltk
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from src.text_filter import fast_sent_tokenize
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+SAMPLES = {
+    "development": os.path.join(DATA, "annotated_sentences.txt"),
+    "held-out": os.path.join(DATA, "annotated_sentences_heldout.txt"),
+}
+
+
+def load_sample(path):
+    paragraphs, current = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#"):
+                continue
+            if line:
+                current.append(line)
+            elif current:
+                paragraphs.append(current)
+                current = []
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def splitters():
+    found = {}
+    try:
+        nltk.data.find("tokenizers/punkt_tab")
+        found["punkt (pretrained)"] = nltk.sent_tokenize
+    except LookupError:
+        print("punkt_tab is not installed, so there is no pretrained punkt baseline; install it with")
+        print("  python -c \"import nltk; nltk.download('punkt_tab')\"\n")
+    found["punkt (untrained)"] = PunktSentenceTokenizer().tokenize
+    found["regex fallback"] = lambda t: re.split(r'(?<=[.!?])\s+(?=[A-Z])', t)
+    found["fast"] = lambda t: fast_sent_tokenize(t, workers=1)
+    return found
+
+
+def boundaries(sentences):
+    ends, pos = set(), 0
+    for s in sentences:
+        pos += len(re.sub(r"\s+", "", s))
+        ends.add(pos)
+    return ends
+
+
+def score(pred, gold):
+    p, g = boundaries(pred), boundaries(gold)
+    tp = len(p & g)
+    precision, recall = tp / len(p), tp / len(g)
+    f1 = 2 * precision * recall / (precision + recall) if tp else 0.0
+    exact = len({s.strip() for s in pred} & set(gold)) / len(gold)
+    return precision, recall, f1, exact
+
+
+def throughput(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text.encode("utf-8")) / 1e6 / best
+
+
+def main(megabytes=8):
+    found = splitters()
+    for sample, path in SAMPLES.items():
+        gold = [s for p in load_sample(path) for s in p]
+        # Single-spaced, as clean_text hands it to split_sentences
+        text = " ".join(gold)
+        print(f"accuracy on {len(gold)} {sample} sentences")
+        print(f"{'splitter':20s} {'precision':>9s} {'recall':>7s} {'F1':>6s} {'exact':>6s}")
+        for name, fn in found.items():
+            precision, recall, f1, exact = score(fn(text), gold)
+            print(f"{name:20s} {precision:9.3f} {recall:7.3f} {f1:6.3f} {exact:6.1%}")
+        print()
+
+    paragraphs = load_sample(SAMPLES["development"])
+    sample = "\n\n".join(" ".join(p) for p in paragraphs) + "\n\n"
+    big = sample * max(1, int(megabytes * 1e6 / len(sample)))
+    print(f"throughput on {len(big) / 1e6:.1f} MB")
+    print(f"{'splitter':20s} {'MB/s':>8s}")
+    for name, fn in found.items():
+        print(f"{name:20s} {throughput(fn, big):8.1f}")
+    cpus = os.cpu_count() or 1
+    mbps = throughput(lambda t: fast_sent_tokenize(t, workers=cpus, chunk_size=1 << 20), big)
+    print(f"{f'fast ({cpus} processes)':20s} {mbps:8.1f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,52 @@
+"""
+Sustained sentences/second of the remote TTS path against the local stub server.
+
+Compares a one-request-at-a-time client without keep-alive (what gTTS does per
+sentence) with the pooled, rate-limited AsyncTTSClient, while the stub injects
+latency, a server-side rate limit and random 429s.
+Run from the repo root: python -m benchmarks.tts_client_throughput [sentences]
+"""
+
+import asyncio
+import sys
+import time
+
+from benchmarks.doc_store_sessions import make_sentences
+from benchmarks.tts_stub_server import StubTTSServer
+from src.tts_client import AsyncTTSClient
+
+
+async def run(url, sentences, **client_kwargs):
+    async with AsyncTTSClient(url=url, backoff_base=0.05, **client_kwargs) as client:
+        start = time.perf_counter()
+        if client.max_concurrency == 1:
+            results = [await client.synthesize(s) for s in sentences]
+        else:
+            results = await asyncio.gather(*(client.synthesize(s) for s in sentences))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return elapsed, client.stats
+
+
+def main(n=200):
+    # Sentences under 100 chars are a single request; repeat a few to exercise coalescing
+    sentences = [s[:95] for s in make_sentences(n)]
+    sentences += sentences[: n // 10]
+    configs = [
+        ("sequential, no keep-alive", dict(max_concurrency=1, rate=1000, burst=1000, keepalive=False)),
+        ("pooled, 8 workers, 40 req/s", dict(max_concurrency=8, rate=40, burst=8)),
+        ("pooled, 16 workers, 80 req/s", dict(max_concurrency=16, rate=80, burst=16)),
+    ]
+    print(f"{len(sentences)} sentences, stub latency 50 ms, server limit 60 req/s, 2% random 429s")
+    for label, kwargs in configs:
+        server = StubTTSServer(latency=0.05, jitter=0.01, rate=60, p429=0.02).start()
+        elapsed, stats = asyncio.run(run(server.url, sentences, **kwargs))
+        server.shutdown()
+        print(f"{label:30s} {len(sentences) / elapsed:7.1f} sentences/s  "
+              f"requests={stats['requests']} retries={stats['retries']} "
+              f"coalesced={stats['coalesced']} connections={server.stats['connections']}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,125 @@
+"""
+Local stand-in for the Google TTS endpoint used by gTTS.
+
+Answers batchexecute POSTs with an MP3 stub wrapped the way the real endpoint
+does, with configurable latency, a server-side rate limit and random 429s.
+Run standalone: python -m benchmarks.tts_stub_server --port 8765 --latency 0.15
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH = "/_/TranslateWebserverUi/data/batchexecute"
+# MPEG-2 Layer III, 32 kbps, 24 kHz mono (gTTS output format): 96-byte frames of 24 ms
+MP3_FRAME = b"\xff\xf3\x44\xc4" + b"\x00" * 92
+BYTES_PER_CHAR = 270  # ~32 kbps mono at ~15 chars/s of speech
+
+
+def stub_mp3(text: str, bytes_per_char: int = BYTES_PER_CHAR) -> bytes:
+    n = max(1, len(text) * bytes_per_char // len(MP3_FRAME))
+    return MP3_FRAME * n
+
+
+def _text_from_body(body: str) -> str:
+    freq = urllib.parse.parse_qs(body).get("f.req", ["[]"])[0]
+    try:
+        return json.loads(json.loads(freq)[0][0][1])[0]
+    except (ValueError, IndexError, TypeError):
+        return ""
+
+
+class StubTTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr=("127.0.0.1", 0), latency=0.1, jitter=0.05, rate=None, p429=0.0,
+                 bytes_per_char=BYTES_PER_CHAR):
+        super().__init__(addr, _Handler)
+        self.bytes_per_char = bytes_per_char
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.p429 = p429
+        self.stats = {'requests': 0, 'connections': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+        self._tokens = float(rate or 0)
+        self._updated = time.monotonic()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PATH}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def _admit(self) -> bool:
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.p429 and random.random() < self.p429:
+                self.stats['throttled'] += 1
+                return False
+            if self.rate:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens < 1:
+                    self.stats['throttled'] += 1
+                    return False
+                self._tokens -= 1
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        if self.path != PATH:
+            return self._send(404)
+        time.sleep(max(0.0, self.server.latency + random.uniform(-1, 1) * self.server.jitter))
+        if not self.server._admit():
+            return self._send(429, headers=[("Retry-After", "0.5")])
+        audio = base64.b64encode(stub_mp3(_text_from_body(body), self.server.bytes_per_char)).decode()
+        rpc = [["wrb.fr", "jQ1olc", f'["{audio}"]', None, None, None, "generic"]]
+        payload = (")]}'\n\n" + json.dumps(rpc, separators=(",", ":")) + "\n").encode()
+        self._send(200, payload, headers=[("Content-Type", "application/json; charset=utf-8")])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, default=None, help="server-side requests/s before 429")
+    parser.add_argument("--p429", type=float, default=0.0, help="probability of a random 429")
+    args = parser.parse_args()
+    server = StubTTSServer(("127.0.0.1", args.port), args.latency, args.jitter, args.rate, args.p429)
+    print(f"Stub TTS listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import weakref
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+_SEP = "\n"
+
+# Process-wide registry. Values are weak so a document is freed as soon as the
+# last session holding it is cleared or expires.
+_documents: "weakref.WeakValueDictionary[str, Document]" = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+# key -> Future for documents being built right now
+_building = {}
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Document:
+    """Immutable sentence store shared by every session reading the same PDF.
+
+    Sentences live in one text buffer; ``offsets[i]`` is where sentence ``i``
+    starts and ``offsets[i + 1] - 1`` where it ends (a one-char separator sits
+    between sentences). Per-sentence estimated durations are computed once at
+    build time; playback falls back to them when an audio file cannot be timed.
+    """
+    key: str
+    text: str
+    offsets: array
+    durations: array
+    total_words: int
+    total_duration: float
+    stats: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("sentence index out of range")
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def est_minutes(self) -> float:
+        return self.total_duration / 60.0
+
+    @property
+    def pdf_hash(self) -> str:
+        """SHA-256 of the source PDF (the first part of key)."""
+        return self.key.partition(":")[0]
+
+    @property
+    def full_text(self) -> str:
+        """All sentences joined by single spaces."""
+        return self.text[:-1].replace(_SEP, " ") if self.text else ""
+
+
+def pdf_digest(pdf_bytes) -> str:
+    """SHA-256 of the PDF contents (any bytes-like object, so uploads need not be copied)."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def document_key(pdf_hash: str, mode: str = "balanced", splitter: str = "punkt") -> str:
+    """pdf_digest of the PDF plus the filter mode and splitter that produced the sentences."""
+    return f"{pdf_hash}:{mode}:{splitter}"
+
+
+def build_document(key: str, sentences, stats=None, words_per_minute: int = 150) -> Document:
+    """Pack a list of sentences into a compact Document."""
+    sentences = [s.replace(_SEP, " ") for s in sentences]
+    offsets = array("Q", [0])
+    durations = array("d")
+    total_words = 0
+    pos = 0
+    for s in sentences:
+        pos += len(s) + 1
+        offsets.append(pos)
+        words = len(s.split())
+        total_words += words
+        # Same estimate as tts_utils.estimate_duration
+        durations.append(max((words / words_per_minute) * 60, 1.0))
+    text = "".join(s + _SEP for s in sentences)
+    return Document(
+        key=key,
+        text=text,
+        offsets=offsets,
+        durations=durations,
+        total_words=total_words,
+        total_duration=(total_words / words_per_minute) * 60,
+        stats=MappingProxyType(dict(stats or {})),
+    )
+
+
+def get_document(key: str):
+    """Return the shared Document for key, or None if no session holds it."""
+    return _documents.get(key)
+
+
+def get_or_build_document(key: str, builder) -> Document:
+    """Return the shared Document for key, calling builder() once if missing.
+
+    builder must return ``(sentences, stats)``. It runs outside the registry
+    lock: concurrent sessions opening the same paper wait for one build, while
+    sessions opening other papers are not blocked by it.
+    """
+    with _lock:
+        doc = _documents.get(key)
+        if doc is not None:
+            return doc
+        future = _building.get(key)
+        owner = future is None
+        if owner:
+            future = _building[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        sentences, stats = builder()
+        doc = build_document(key, sentences, stats)
+    except BaseException as e:
+        with _lock:
+            del _building[key]
+        future.set_exception(e)
+        raise
+    with _lock:
+        _documents[key] = doc
+        del _building[key]
+    future.set_result(doc)
+    return doc
+
+
+def document_count() -> int:
+    return len(_documents)
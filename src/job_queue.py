@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+DEFAULT_DB = "data/jobs.sqlite3"
+HEARTBEAT_INTERVAL = 5.0  # seconds; active_workers() allows 15
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    priority INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    available_at REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at, priority);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    seen_at REAL NOT NULL,
+    jobs_done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def job_key(kind: str, payload: dict) -> str:
+    """Stable identity of a job: same kind and payload means the same work."""
+    blob = json.dumps([kind, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """Durable job queue in a single SQLite file; no broker needed.
+
+    Workers claim jobs under a time-limited lease and keep it alive while they
+    run. A job whose lease expires (worker crashed or was killed) becomes
+    claimable again; failures are retried with exponential backoff until
+    max_attempts, after which the job is marked failed. Connections are per
+    thread, so one JobQueue can be shared by Streamlit sessions.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, payload: dict, priority: int = 0, max_attempts: int = 3,
+                reuse_done: bool = True, retry_failed: bool = False) -> int:
+        """Add a job and return its id, or the id of the latest identical job.
+
+        An identical queued, running or failed job is returned instead of adding
+        a new one, so a failure stays visible to the caller until it asks for a
+        retry with retry_failed. With reuse_done, a finished job is returned too.
+        """
+        key = job_key(kind, payload)
+        statuses = ["queued", "running"]
+        if reuse_done:
+            statuses.append("done")
+        if not retry_failed:
+            statuses.append("failed")
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE dedup_key = ? AND status IN ({','.join('?' * len(statuses))}) "
+                "ORDER BY id DESC LIMIT 1",
+                (key, *statuses),
+            ).fetchone()
+            if row is not None:
+                job_id = row["id"]
+            else:
+                now = time.time()
+                job_id = conn.execute(
+                    "INSERT INTO jobs (kind, payload, dedup_key, priority, max_attempts, available_at, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, json.dumps(payload), key, priority, max_attempts, now, now),
+                ).lastrowid
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, worker: str, kinds=None, lease_seconds: float = 60.0):
+        """Atomically lease the next ready job for worker. Returns a dict or None."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Running jobs whose lease ran out are abandoned: retry or give up
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = 'lease expired' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND lease_until < ?",
+                (now,),
+            )
+            sql = "SELECT * FROM jobs WHERE status = 'queued' AND available_at <= ?"
+            args = [now]
+            if kinds:
+                sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+                args += list(kinds)
+            row = conn.execute(sql + " ORDER BY priority DESC, id LIMIT 1", args).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "lease_until = ?, started_at = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        job["started_at"] = now
+        return job
+
+    def extend_lease(self, job_id: int, worker: str, lease_seconds: float = 60.0) -> bool:
+        cur = self._conn().execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result=None) -> bool:
+        conn = self._conn()
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(result), time.time(), job_id, worker),
+        )
+        conn.execute("UPDATE workers SET jobs_done = jobs_done + 1 WHERE id = ?", (worker,))
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, backoff: float = 2.0) -> bool:
+        """Record a failed attempt; requeue with exponential backoff unless out of attempts."""
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END, "
+            "available_at = ? + ? * (1 << (attempts - 1)), "
+            "worker = NULL, lease_until = NULL, error = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (now, now, backoff, error, job_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def get(self, job_id: int):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def status(self, job_ids):
+        """Map of job id -> status for a batch of ids (cheap enough to poll every rerun)."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT id, status FROM jobs WHERE id IN ({','.join('?' * len(job_ids))})", job_ids
+        ).fetchall()
+        return {r["id"]: r["status"] for r in rows}
+
+    def counts(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def prune(self, older_than: float) -> int:
+        """Delete done and failed jobs that finished more than older_than seconds ago.
+
+        Finished process_document jobs hold every sentence of a paper in
+        result, so the table would otherwise grow with every upload.
+        """
+        cur = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - older_than,),
+        )
+        return cur.rowcount
+
+    def heartbeat(self, worker: str):
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO workers (id, started_at, seen_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET seen_at = excluded.seen_at",
+            (worker, now, now),
+        )
+
+    def active_workers(self, within: float = 15.0) -> int:
+        """Workers seen within the last `within` seconds or holding an unexpired job lease."""
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT COUNT(*) AS n FROM workers WHERE seen_at >= ? OR id IN "
+            "(SELECT worker FROM jobs WHERE status = 'running' AND lease_until >= ?)",
+            (now - within, now),
+        ).fetchone()
+        return row["n"]
+
+    def retire(self, worker: str):
+        self._conn().execute("DELETE FROM workers WHERE id = ?", (worker,))
+
+
+def run_worker(queue: JobQueue, handlers: dict, worker: str | None = None, lease_seconds: float = 60.0,
+               poll_interval: float = 0.5, max_jobs: int | None = None, stop: threading.Event | None = None,
+               retention: float | None = 24 * 3600.0, sweep_interval: float = 600.0):
+    """Claim and run jobs until stopped. handlers maps job kind -> fn(payload) -> JSON-able result.
+
+    Every sweep_interval seconds, finished jobs older than retention are pruned
+    (retention=None keeps them forever).
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    stop = stop or threading.Event()
+    done = 0
+    queue.heartbeat(worker)
+    last_beat = time.monotonic()
+    last_sweep = None
+    try:
+        while not stop.is_set() and (max_jobs is None or done < max_jobs):
+            if time.monotonic() - last_beat > HEARTBEAT_INTERVAL:
+                queue.heartbeat(worker)
+                last_beat = time.monotonic()
+            if retention is not None and (last_sweep is None or time.monotonic() - last_sweep > sweep_interval):
+                queue.prune(retention)
+                last_sweep = time.monotonic()
+            job = queue.claim(worker, kinds=list(handlers), lease_seconds=lease_seconds)
+            if job is None:
+                stop.wait(poll_interval)
+                continue
+
+            # Keep the lease alive from a side thread while the handler runs
+            running = threading.Event()
+
+            def keep_alive(job_id=job["id"]):
+                # Heartbeat on the same fixed interval as when idle, well inside
+                # active_workers' window; extend the lease every lease_seconds / 3
+                lease_queue = JobQueue(queue.path)
+                last_extend = time.monotonic()
+                while not running.wait(min(HEARTBEAT_INTERVAL, lease_seconds / 3)):
+                    lease_queue.heartbeat(worker)
+                    if time.monotonic() - last_extend >= lease_seconds / 3:
+                        lease_queue.extend_lease(job_id, worker, lease_seconds)
+                        last_extend = time.monotonic()
+
+            keeper = threading.Thread(target=keep_alive, daemon=True)
+            keeper.start()
+            try:
+                result = handlers[job["kind"]](job["payload"])
+            except Exception as e:
+                running.set()
+                print(f"Job {job['id']} ({job['kind']}) failed: {e}")
+                queue.fail(job["id"], worker, f"{e}\n{traceback.format_exc(limit=5)}")
+            else:
+                running.set()
+                queue.complete(job["id"], worker, result)
+            keeper.join()
+            done += 1
+    finally:
+        queue.retire(worker)
+    return done
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import threading
+
+from src.job_queue import DEFAULT_DB, JobQueue
+from src.pdf_utils import extract_text
+from src.text_filter import analyze_text_quality, clean_text, split_sentences
+from src.tts_utils import generate_audio, get_audio_format
+
+UPLOAD_DIR = "data/uploads"
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def shared_queue(path: str = DEFAULT_DB) -> JobQueue:
+    """Process-wide JobQueue (connections are per thread, so sessions can share it)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None or _queue.path != path:
+            _queue = JobQueue(path)
+        return _queue
+
+
+def save_upload(pdf_bytes, upload_dir: str = UPLOAD_DIR, pdf_hash: str | None = None) -> str:
+    """Store an uploaded PDF under its content hash so workers can read it.
+
+    Pass pdf_hash when it is already known to skip hashing the file again.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f"{pdf_hash or hashlib.sha256(pdf_bytes).hexdigest()}.pdf")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.part"
+        with open(tmp, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp, path)
+    return path
+
+
+def process_pdf(pdf_file, mode: str = "balanced", splitter: str = "punkt"):
+    """Extract, analyze and filter a PDF. Returns (sentences, text_stats)."""
+    raw_text = extract_text(pdf_file)
+
+    # Analyze text before filtering
+    text_stats = analyze_text_quality(raw_text, mode=mode)
+
+    # Apply aggressive filtering
+    filtered_text = clean_text(raw_text, mode=mode)
+    return split_sentences(filtered_text, mode=mode, splitter=splitter), text_stats
+
+
+def handle_process_document(payload):
+    with open(payload["pdf_path"], "rb") as f:
+        sentences, stats = process_pdf(f, mode=payload.get("mode", "balanced"),
+                                       splitter=payload.get("splitter", "punkt"))
+    return {"sentences": sentences, "stats": stats}
+
+
+def handle_synthesize(payload):
+    filename = payload["filename"]
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    fmt = get_audio_format(payload.get("format", "mp3"))
+    if not generate_audio(payload["text"], filename, lang=payload.get("lang", "en"), fmt=fmt):
+        raise RuntimeError(f"audio generation failed for {filename}")
+    return {"path": filename}
+
+
+HANDLERS = {
+    "process_document": handle_process_document,
+    "synthesize": handle_synthesize,
+}
@@ -1,6 +1,17 @@
 import re
+import threading
+from collections import OrderedDict
+
 import fitz  # PyMuPDF
 
+# Page viewer settings: on-screen page width at 100% zoom and cache limits.
+# Widest zoom stays under st.image's 1460px cap, above which it re-encodes every rerun.
+PAGE_WIDTH_PX = 700
+ZOOM_LEVELS = (0.75, 1.0, 1.25, 1.5, 2.0)
+PAGE_CACHE_BYTES = 64 * 1024 * 1024
+MAX_OPEN_BYTES = 256 * 1024 * 1024  # total size of PDFs kept parsed between reruns
+MAX_PAGE_TEXTS = 64
+
 
 def _clean_block_text(txt: str) -> str:
     """Normalize block text: fix hyphenation, collapse spaces, keep paragraph breaks."""
@@ -76,3 +87,120 @@ def extract_text(pdf_file):
 
     doc.close()
     return "\n\n".join(page_texts)
+
+
+class PageImageCache:
+    """LRU of rendered page images keyed by (pdf hash, page, zoom), bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = PAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image: bytes):
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._images[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.size -= len(evicted)
+
+
+# Shared by all sessions; MuPDF objects must not be used from two threads at once
+page_cache = PageImageCache()
+_open_docs = OrderedDict()
+_page_texts = OrderedDict()
+_mupdf_lock = threading.Lock()
+
+
+def _open_pdf(pdf_hash: str, pdf_bytes: bytes):
+    """Open (or reuse) the parsed PDF for pdf_hash. Caller holds _mupdf_lock.
+
+    Opening only reads the cross-reference table; pages are loaded on access,
+    so this does not scale with page count.
+    """
+    entry = _open_docs.pop(pdf_hash, None)
+    if entry is None:
+        entry = (fitz.open(stream=pdf_bytes, filetype="pdf"), len(pdf_bytes))
+    _open_docs[pdf_hash] = entry
+    # Evict least recently used documents over the byte budget, never the one just opened
+    total = sum(size for _, size in _open_docs.values())
+    while total > MAX_OPEN_BYTES and len(_open_docs) > 1:
+        doc, size = _open_docs.popitem(last=False)[1]
+        doc.close()
+        total -= size
+    return entry[0]
+
+
+def page_count(pdf_hash: str, pdf_bytes: bytes) -> int:
+    with _mupdf_lock:
+        return _open_pdf(pdf_hash, pdf_bytes).page_count
+
+
+def render_page(pdf_hash: str, pdf_bytes: bytes, page_no: int, zoom: float = 1.0, cache=None) -> bytes:
+    """PNG of one page, PAGE_WIDTH_PX * zoom pixels wide, rendered only on a cache miss."""
+    if cache is None:
+        cache = page_cache
+    key = (pdf_hash, page_no, zoom)
+    image = cache.get(key)
+    if image is not None:
+        return image
+    with _mupdf_lock:
+        # Another session may have rendered it while we waited
+        image = cache.get(key)
+        if image is None:
+            page = _open_pdf(pdf_hash, pdf_bytes)[page_no]
+            scale = PAGE_WIDTH_PX * zoom / page.rect.width
+            image = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False).tobytes("png")
+            cache.put(key, image)
+    return image
+
+
+def _words(text: str) -> str:
+    return " ".join(re.findall(r"\w+", re.sub(r"(\w)-\n(\w)", r"\1\2", text).lower()))
+
+
+def find_sentence_page(pdf_hash: str, pdf_bytes: bytes, sentence: str, near: int = 0, ahead: int = 3) -> int:
+    """Page on which sentence starts, looking at pages near..near+ahead (and near-1).
+
+    Reading only moves forward, so a short window around the last known page is
+    enough and the cost does not depend on document length. Returns near if the
+    sentence is not found (e.g. text changed by filtering).
+    """
+    snippet = " ".join(_words(sentence).split()[:6])
+    if not snippet:
+        return near
+    with _mupdf_lock:
+        doc = _open_pdf(pdf_hash, pdf_bytes)
+        for page_no in [*range(near, near + ahead + 1), near - 1]:
+            if not 0 <= page_no < doc.page_count:
+                continue
+            key = (pdf_hash, page_no)
+            text = _page_texts.pop(key, None)
+            if text is None:
+                text = _words(doc[page_no].get_text())
+            _page_texts[key] = text
+            if len(_page_texts) > MAX_PAGE_TEXTS:
+                _page_texts.popitem(last=False)
+            if snippet in text:
+                return page_no
+    return near
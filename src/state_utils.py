@@ -1,13 +1,20 @@
 def init_session_state(st):
     defaults = {
-        'sentences': [],
+        'document': None,
         'is_reading': False,
         'current_sentence': 0,
         'pdf_file': None,
+        'pdf_upload_id': None,
+        'pdf_hash': None,
         'autoplay': True,
         'buffer_size': 5,
         'reading_mode': "Full document audio",
-        'playback_speed': 1.0
+        'playback_speed': 1.0,
+        'audio_format': 'mp3',
+        'synth_jobs': {},
+        'viewer_page': 0,
+        'viewer_zoom': 1.0,
+        'viewer_follow': True
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -1,7 +1,43 @@
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import nltk
 from nltk.tokenize import sent_tokenize
 
+# Tokens that end with a period but rarely end a sentence in scientific text.
+# Stored lowercase without the final period ("e.g." -> "e.g").
+SCIENTIFIC_ABBREVIATIONS = frozenset({
+    'al', 'e.g', 'i.e', 'cf', 'vs', 'viz', 'approx', 'ca', 'resp', 'incl',
+    'dr', 'prof', 'mr', 'mrs', 'jr', 'sr', 'dept', 'univ', 'eds',
+    'inc', 'ltd', 'corp', 'avg',
+    'jan', 'feb', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov',
+})
+
+# Reference abbreviations that are also ordinary words ("the answer is no.",
+# "5 min."): only an abbreviation when a label follows ("No. 7", "Eq. (3)",
+# "Fig. S2", "App. B.").
+REFERENCE_ABBREVIATIONS = frozenset({
+    'fig', 'figs', 'eq', 'eqs', 'tab', 'tabs', 'sec', 'secs', 'ch', 'app',
+    'ref', 'refs', 'no', 'nos', 'vol', 'vols', 'pp', 'p', 'min', 'max',
+})
+_REFERENCE_LABEL_RE = re.compile(r'\(?(?:[A-Z]?\d|[A-Z](?=[.,;:)]))')
+
+# Candidate boundary: terminal punctuation with optional closing quotes/brackets
+# followed by something that can start a sentence, or a blank line. Group 1 is
+# the separating whitespace. Decimals such as "0.5" never match because no
+# whitespace follows the period.
+_BOUNDARY_RE = re.compile(
+    r'(?:[.!?]+["\'\u201d\u2019)\]]*(?=\s+["\'\u201c\u2018(\[]?[A-Z0-9])|(?=\s*\n\s*\n))(\s+)'
+)
+_TOKEN_LEAD = '(["\'\u201c\u2018['
+_PARALLEL_MIN_CHARS = 1 << 20
+
+# worker count -> shared pool for fast_sent_tokenize
+_split_pools = {}
+_split_pools_lock = threading.Lock()
+
 
 def ensure_nltk_data():
     """Ensure required NLTK data is downloaded."""
@@ -104,14 +140,96 @@ def clean_text(text: str, mode: str = 'balanced') -> str:
     return ' '.join(cleaned_lines)
 
 
-def split_sentences(text: str, mode: str = 'balanced'):
-    """Split text into sentences and filter them."""
-    try:
-        ensure_nltk_data()
-        sentences = sent_tokenize(text)
-    except Exception as e:
-        print(f"NLTK tokenization failed: {e}")
-        sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
+def _is_boundary(text: str, match) -> bool:
+    """Reject candidate boundaries that follow an abbreviation or an initial."""
+    end = match.start()
+    if text[end] != '.' or match.group(1).count('\n') >= 2:
+        return True
+    token = text[text.rfind(' ', 0, end) + 1:end].lstrip(_TOKEN_LEAD).lower()
+    if token in SCIENTIFIC_ABBREVIATIONS:
+        return False
+    if token in REFERENCE_ABBREVIATIONS and _REFERENCE_LABEL_RE.match(text, match.end(1)):
+        return False
+    # Single-letter initials ("J. Smith") and "et al." style compounds
+    return not (len(token) == 1 and token.isalpha())
+
+
+def _scan_sentences(text: str):
+    sentences = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        if _is_boundary(text, m):
+            sentences.append(text[start:m.start(1)])
+            start = m.end(1)
+    sentences.append(text[start:])
+    return [s.strip() for s in sentences if s and not s.isspace()]
+
+
+def _chunk_offsets(text: str, chunk_size: int):
+    """Cut points every ~chunk_size chars, preferring paragraph breaks over sentence ends.
+
+    On the app path clean_text has already joined all lines with spaces, so
+    there are no paragraph breaks left and chunks end at sentence boundaries.
+    """
+    cuts = [0]
+    while cuts[-1] + chunk_size < len(text):
+        target = cuts[-1] + chunk_size
+        para = text.find('\n\n', target, target + chunk_size // 4)
+        for m in _BOUNDARY_RE.finditer(text, para if para != -1 else target):
+            if _is_boundary(text, m):
+                cuts.append(m.end(1))
+                break
+        else:
+            break
+    cuts.append(len(text))
+    return cuts
+
+
+def fast_sent_tokenize(text: str, workers: int | None = None, chunk_size: int = _PARALLEL_MIN_CHARS):
+    """Split scientific text into sentences with one precompiled regex scan.
+
+    Knows common scientific abbreviations ("et al.", "Fig.", "e.g.", "Eq.", "vs.")
+    and never splits decimals. Texts larger than two chunks are split at paragraph
+    (or sentence) boundaries and scanned in parallel in a shared process pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(text) < 2 * chunk_size:
+        return _scan_sentences(text)
+    cuts = _chunk_offsets(text, chunk_size)
+    chunks = [text[a:b] for a, b in zip(cuts, cuts[1:])]
+    parts = split_pool(workers).map(_scan_sentences, chunks)
+    return [sentence for part in parts for sentence in part]
+
+
+def split_pool(workers: int) -> ProcessPoolExecutor:
+    """Process-wide pool of `workers` processes for fast_sent_tokenize, created on first use.
+
+    Uses spawn: the Streamlit server is multithreaded (tornado, the TTS client
+    loop, the transcode pool), and forking a multithreaded process can deadlock.
+    """
+    with _split_pools_lock:
+        pool = _split_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _split_pools[workers] = pool
+        return pool
+
+
+def split_sentences(text: str, mode: str = 'balanced', splitter: str = 'punkt'):
+    """Split text into sentences and filter them.
+
+    splitter='punkt' uses NLTK (regex fallback if unavailable); 'fast' uses
+    fast_sent_tokenize, which is quicker and aware of scientific abbreviations.
+    """
+    if splitter == 'fast':
+        sentences = fast_sent_tokenize(text)
+    else:
+        try:
+            ensure_nltk_data()
+            sentences = sent_tokenize(text)
+        except Exception as e:
+            print(f"NLTK tokenization failed: {e}")
+            sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
 
     cleaned_sentences = []
     for raw in sentences:
@@ -0,0 +1,209 @@
+import asyncio
+import atexit
+import base64
+import os
+import random
+import re
+import threading
+import time
+
+import aiohttp
+from gtts import gTTS
+
+DEFAULT_URL = "https://translate.google.com/_/TranslateWebserverUi/data/batchexecute"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_RATE = 5.0  # requests per second per client
+
+_AUDIO_RE = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+class TTSRequestError(Exception):
+    """Raised when a TTS request still fails after all retries."""
+
+    def __init__(self, msg, status=None):
+        super().__init__(msg)
+        self.status = status
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncTTSClient:
+    """Pooled, rate-limited client for the Google Translate TTS endpoint used by gTTS.
+
+    Requests are built with gTTS (same text splitting and payload) but sent over a
+    shared keep-alive aiohttp session. Identical in-flight texts are coalesced into
+    one request, 429/5xx and connection errors are retried with full-jitter
+    exponential backoff (honouring Retry-After), and a token bucket plus a
+    semaphore cap request rate and concurrency.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, rate: float = DEFAULT_RATE, burst: int = 5,
+                 max_concurrency: int = 4, max_retries: int = 5, backoff_base: float = 0.5,
+                 backoff_cap: float = 30.0, timeout: float = 30.0, keepalive: bool = True):
+        self.url = url
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'coalesced': 0}
+        self._session = None
+        self._bucket = None
+        self._semaphore = None
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self):
+        # Created lazily so all asyncio primitives bind to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, force_close=not self.keepalive)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=gTTS.GOOGLE_TTS_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True,  # honour HTTP(S)_PROXY like gTTS does
+            )
+            self._bucket = TokenBucket(self.rate, self.burst)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def _post(self, body: str) -> bytes:
+        session = self._ensure_session()
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            status, retry_after = None, None
+            try:
+                async with self._semaphore:
+                    self.stats['requests'] += 1
+                    async with session.post(self.url, data=body) as resp:
+                        status = resp.status
+                        if status == 200:
+                            return _parse_audio(await resp.text())
+                        retry_after = resp.headers.get("Retry-After")
+                        await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise TTSRequestError(f"TTS request failed: {e}") from e
+            else:
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise TTSRequestError(f"TTS request failed with HTTP {status}", status=status)
+                if status == 429:
+                    self.stats['throttled'] += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def _synthesize(self, text: str, lang: str) -> bytes:
+        bodies = gTTS(text=text, lang=lang).get_bodies()
+        parts = await asyncio.gather(*(self._post(b) for b in bodies))
+        return b"".join(parts)
+
+    async def synthesize(self, text: str, lang: str = 'en') -> bytes:
+        """Return MP3 bytes for text, sharing one request among identical concurrent calls."""
+        key = (lang, text)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._synthesize(text, lang))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    async def save(self, text: str, filename: str, lang: str = 'en') -> bool:
+        """Synthesize text to filename atomically. Mirrors generate_audio: prints and returns False on error."""
+        try:
+            audio = await self.synthesize(text, lang=lang)
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            return False
+        # Write aside and rename so readers never see a half-written file
+        tmp = f"{filename}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp, filename)
+        return True
+
+    async def save_many(self, items, lang: str = 'en'):
+        """Synthesize (text, filename) pairs concurrently; returns a list of bools."""
+        return await asyncio.gather(*(self.save(text, fn, lang=lang) for text, fn in items))
+
+
+def _parse_audio(payload: str) -> bytes:
+    chunks = []
+    for line in payload.splitlines():
+        if "jQ1olc" in line:
+            match = _AUDIO_RE.search(line)
+            if not match:
+                raise TTSRequestError("TTS response contained no audio")
+            chunks.append(base64.b64decode(match.group(1).encode("ascii")))
+    if not chunks:
+        raise TTSRequestError("TTS response contained no audio")
+    return b"".join(chunks)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """Return the process-wide (client, loop) pair, starting its event loop thread once.
+
+    Streamlit runs each session's script in its own thread; routing all of them
+    through one loop means one connection pool and one rate limit per process.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tts-client", daemon=True).start()
+            client = AsyncTTSClient()
+            atexit.register(lambda: asyncio.run_coroutine_threadsafe(client.close(), loop).result(5))
+            _shared = (client, loop)
+        return _shared
+
+
+def run_shared(coro_fn, *args, **kwargs):
+    """Run coro_fn(client, ...) on the shared client loop and wait for the result."""
+    client, loop = shared_client()
+    return asyncio.run_coroutine_threadsafe(coro_fn(client, *args, **kwargs), loop).result()
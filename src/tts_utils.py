@@ -1,34 +1,146 @@
-from gtts import gTTS
+import asyncio
+import hashlib
 import os
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from src.tts_client import run_shared
 
-def get_audio_duration(filepath: str, fallback_text: str | None = None, words_per_minute: int = 150) -> float:
+AUDIO_EXTENSIONS = ('.mp3', '.ogg', '.webm')
+
+# Shared audio cache bounds (files are content-keyed and reused across sessions)
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_CACHE_MAX_MB', '1024')) * 1024 * 1024
+AUDIO_CACHE_MAX_AGE = float(os.environ.get('AUDIO_CACHE_MAX_AGE_DAYS', '7')) * 24 * 3600
+AUDIO_CACHE_MIN_AGE = 3600  # never evict files used within the last hour
+AUDIO_CACHE_PRUNE_INTERVAL = 300
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """Output encoding for synthesized speech. codec=None keeps gTTS's MP3 untouched."""
+    name: str
+    ext: str
+    mime: str
+    codec: str | None = None
+    bitrate: str | None = None
+    container: str | None = None
+    channels: int = 1
+
+    def ffmpeg_args(self):
+        args = ['-vn', '-ac', str(self.channels), '-c:a', self.codec, '-b:a', self.bitrate]
+        if self.codec == 'libopus':
+            args += ['-application', 'voip']
+        return args + ['-f', self.container]
+
+# gTTS returns 24 kHz mono MP3 at 32 kbps, so useful savings start below that
+# Only containers mutagen can time: step-by-step playback sleeps for the real duration
+AUDIO_FORMATS = {
+    'mp3': AudioFormat('mp3', '.mp3', 'audio/mpeg'),
+    'mp3-24k': AudioFormat('mp3-24k', '.mp3', 'audio/mpeg', 'libmp3lame', '24k', 'mp3'),
+    'opus-16k': AudioFormat('opus-16k', '.ogg', 'audio/ogg', 'libopus', '16k', 'ogg'),
+    'opus-12k': AudioFormat('opus-12k', '.ogg', 'audio/ogg', 'libopus', '12k', 'ogg'),
+}
+
+_transcode_pool = None
+_transcode_pool_lock = threading.Lock()
+_last_prune = {}
+_prune_lock = threading.Lock()
+
+def get_audio_format(name: str) -> AudioFormat:
+    return AUDIO_FORMATS.get(name, AUDIO_FORMATS['mp3'])
+
+def audio_cache_path(text, audio_dir='audio', lang='en', fmt: AudioFormat = AUDIO_FORMATS['mp3'], prefix=''):
+    """Cache path for text's audio; the key covers text, language and output format."""
+    key = hashlib.sha1(f"{lang}|{fmt.name}|{text}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(audio_dir, f"{prefix}{key}{fmt.ext}")
+
+def transcode_audio(src: str, dst: str, fmt: AudioFormat) -> bool:
+    """Re-encode src into dst with ffmpeg using fmt's codec and bitrate."""
+    if fmt.codec is None:
+        os.replace(src, dst)
+        return True
+    ffmpeg = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    # Per-writer temp name: the app and workers may produce the same dst at once
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.part"
+    cmd = [ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y', '-i', src,
+           *fmt.ffmpeg_args(), tmp]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(tmp, dst)
+        return True
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, 'stderr', b'') or b''
+        print(f"Error transcoding audio: {e} {detail.decode(errors='replace').strip()}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+def transcode_pool() -> ThreadPoolExecutor:
+    """Process-wide worker pool for transcoding.
+
+    Threads are enough: the encoding itself runs in ffmpeg child processes.
+    """
+    global _transcode_pool
+    with _transcode_pool_lock:
+        if _transcode_pool is None:
+            _transcode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 2,
+                                                 thread_name_prefix='transcode')
+        return _transcode_pool
+
+async def _synthesize_to(client, text, filename, lang='en', fmt: AudioFormat = AUDIO_FORMATS['mp3']):
+    if fmt.codec is None:
+        return await client.save(text, filename, lang=lang)
+    src = f"{filename}.{uuid.uuid4().hex[:8]}.src.mp3"
+    try:
+        if not await client.save(text, src, lang=lang):
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(transcode_pool(), transcode_audio, src, filename, fmt)
+    finally:
+        if os.path.exists(src):
+            os.remove(src)
+
+async def _synthesize_many(client, items, lang='en', fmt: AudioFormat = AUDIO_FORMATS['mp3']):
+    return await asyncio.gather(*(_synthesize_to(client, t, fn, lang, fmt) for t, fn in items))
+
+def get_audio_duration(filepath: str, fallback_text: str | None = None, words_per_minute: int = 150,
+                       fallback: float | None = None) -> float:
     """Return audio duration in seconds using mutagen if available; fallback to estimate.
 
-    If mutagen isn't installed or parsing fails, estimate by words per minute if fallback_text is provided.
+    If mutagen isn't installed or parsing fails, return fallback (e.g. a precomputed
+    estimate) or estimate by words per minute if fallback_text is provided.
     """
     try:
-        from mutagen.mp3 import MP3  # type: ignore
-        audio = MP3(filepath)
+        from mutagen import File  # type: ignore
+        audio = File(filepath)
         dur = float(getattr(audio.info, 'length', 0.0))
         if dur and dur > 0:
             return dur
     except Exception:
         pass
 
+    if fallback is not None:
+        return fallback
     if fallback_text:
         words = len(fallback_text.split())
         return max((words / words_per_minute) * 60.0, 1.0)
     return 1.0
 
-def generate_audio(text, filename, lang='en'):
-    """Generate audio file from text using gTTS."""
-    try:
-        tts = gTTS(text=text, lang=lang)
-        tts.save(filename)
-        return True
-    except Exception as e:
-        print(f"Error generating audio: {e}")
-        return False
+def generate_audio(text, filename, lang='en', fmt: AudioFormat = AUDIO_FORMATS['mp3']):
+    """Generate audio file from text via the shared pooled TTS client, transcoding to fmt."""
+    ok = run_shared(_synthesize_to, text, filename, lang=lang, fmt=fmt)
+    maybe_prune_audio_cache(os.path.dirname(filename) or '.')
+    return ok
+
+def generate_audio_batch(items, lang='en', fmt: AudioFormat = AUDIO_FORMATS['mp3']):
+    """Generate audio for (text, filename) pairs concurrently; returns a list of bools."""
+    items = list(items)
+    results = run_shared(_synthesize_many, items, lang=lang, fmt=fmt)
+    for audio_dir in {os.path.dirname(fn) or '.' for _, fn in items}:
+        maybe_prune_audio_cache(audio_dir)
+    return results
 
 def estimate_duration(text, words_per_minute=150):
     """Estimate reading duration based on word count."""
@@ -40,9 +152,59 @@ def cleanup_audio_files(audio_dir):
     """Clean up temporary audio files."""
     if os.path.exists(audio_dir):
         for file in os.listdir(audio_dir):
-            if file.endswith('.mp3'):
+            if file.endswith(AUDIO_EXTENSIONS):
                 os.remove(os.path.join(audio_dir, file))
 
+def touch_audio(path):
+    """Mark a cached audio file as used so eviction keeps it longer."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def prune_audio_cache(audio_dir='audio', max_bytes=AUDIO_CACHE_MAX_BYTES, max_age=AUDIO_CACHE_MAX_AGE,
+                      min_age=AUDIO_CACHE_MIN_AGE):
+    """Evict least recently used audio files older than max_age or beyond max_bytes in total.
+
+    Files used within min_age seconds are kept even over budget, so audio a
+    session is about to play is not removed under it. Returns bytes freed.
+    """
+    try:
+        entries = [e for e in os.scandir(audio_dir) if e.is_file() and e.name.endswith(AUDIO_EXTENSIONS)]
+    except FileNotFoundError:
+        return 0
+    files = []
+    for e in entries:
+        try:
+            st = e.stat()
+        except FileNotFoundError:
+            continue
+        files.append((st.st_mtime, st.st_size, e.path))
+    files.sort()
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    freed = 0
+    for mtime, size, path in files:
+        age = now - mtime
+        if age < min_age or (age < max_age and total <= max_bytes):
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        freed += size
+    return freed
+
+def maybe_prune_audio_cache(audio_dir='audio', interval=AUDIO_CACHE_PRUNE_INTERVAL):
+    """prune_audio_cache at most once per interval seconds per directory in this process."""
+    with _prune_lock:
+        now = time.monotonic()
+        if now - _last_prune.get(audio_dir, -interval) < interval:
+            return 0
+        _last_prune[audio_dir] = now
+    return prune_audio_cache(audio_dir)
+
 def combine_audio_files(audio_dir, output_file):
     """Combine all sentence MP3s in audio_dir into one MP3 file using pydub."""
     from pydub import AudioSegment
@@ -0,0 +1,65 @@
+"""
+Background worker for Listen2Research.
+
+Runs document-processing and synthesis jobs that app.py enqueues in the shared
+SQLite job queue. Start one or more next to the app (same working directory or
+shared data/ and audio/ volumes):
+
+    python worker.py --processes 4
+"""
+
+import argparse
+import multiprocessing
+import signal
+import threading
+
+from src.job_queue import DEFAULT_DB, run_worker
+from src.jobs import HANDLERS, shared_queue
+from src.tts_client import DEFAULT_RATE, shared_client
+
+
+def _serve(db_path, kinds, lease_seconds, tts_rate, retention):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    # Each process has its own client, so each gets its share of the total rate
+    client, _ = shared_client()
+    client.rate = tts_rate
+    client.burst = max(1, min(client.burst, int(tts_rate)))
+    handlers = {k: HANDLERS[k] for k in kinds}
+    run_worker(shared_queue(db_path), handlers, lease_seconds=lease_seconds, stop=stop, retention=retention)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Listen2Research background workers.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="path of the SQLite job queue")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(HANDLERS), default=sorted(HANDLERS),
+                        help="job kinds this worker accepts")
+    parser.add_argument("--lease", type=float, default=60.0, help="lease length in seconds")
+    parser.add_argument("--tts-rate", type=float, default=DEFAULT_RATE,
+                        help="Google TTS requests per second, in total across all processes")
+    parser.add_argument("--retention", type=float, default=24.0,
+                        help="hours to keep finished jobs before pruning them (0 keeps them forever)")
+    args = parser.parse_args()
+
+    print(f"👷 Starting {args.processes} worker(s) on {args.db} for: {', '.join(args.kinds)}")
+    serve_args = (args.db, args.kinds, args.lease, args.tts_rate / args.processes,
+                  args.retention * 3600 if args.retention > 0 else None)
+    if args.processes == 1:
+        _serve(*serve_args)
+        return
+    procs = [multiprocessing.Process(target=_serve, args=serve_args) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+            p.join()
+
+
+if __name__ == "__main__":
+    main()